@@ -2,22 +2,102 @@ import argparse
 import json
 import logging
 import pathlib
-import re
 import sys
-from collections import deque
-from typing import Any, Dict, List, NamedTuple
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Set
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 from tabulate import tabulate
 
 import mwparserfromhell
+from mwparserfromhell.nodes import Text
+from mwparserfromhell.utils import parse_anything
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from ._cache import Cache
 from .level import LevelNameType, get_levels
 
 LOG = logging.getLogger(__name__)
 LOG.setLevel(logging.INFO)
 
+# Shared session so every wiki fetch reuses pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+_SESSION.headers.update({"User-Agent": "quest-script", "From": "user@script"})
+_REQUEST_TIMEOUT = 30
+
+_SKILLCLICK_TOKEN = "Skill clickpic"
+_BRACKET_STRIP = str.maketrans("", "", "[]")
+
+# Raw wiki responses persisted across runs, keyed by page. Entries the wiki
+# sent no validators for can't be revalidated, so they are refetched once
+# they are older than this many seconds
+_CACHE = Cache()
+_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+
+def get_session() -> requests.Session:
+    return _SESSION
+
+
+def _cached_get(key: str, url: str, params: Dict[str, str] = None) -> bytes:
+    entry = _CACHE.get(key)
+
+    # Without validators there is no cheap way to check freshness, so trust
+    # the entry until it expires and then fetch the page in full
+    if entry is not None and entry.etag is None and entry.last_modified is None:
+        if time.time() - entry.fetched_at < _CACHE_MAX_AGE:
+            return entry.body
+        entry = None
+
+    headers = {}
+    if entry is not None:
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    response = _SESSION.get(
+        url, params=params, headers=headers, timeout=_REQUEST_TIMEOUT
+    )
+    if entry is not None and response.status_code == 304:
+        return entry.body
+
+    response.raise_for_status()
+    _CACHE.set(
+        key,
+        response.content,
+        response.headers.get("ETag"),
+        response.headers.get("Last-Modified"),
+    )
+    return response.content
+
+
+def _wiki_slug(title: str) -> str:
+    # Match the hrefs MediaWiki renders for article links
+    return "/w/" + urllib.parse.quote(title.replace(" ", "_"), safe="/:;@$!*(),~")
+
+
+def _wikitable_rows(wikicode: mwparserfromhell.wikicode.Wikicode):
+    # Only rows directly inside class="wikitable" tables carry list data
+    for table in wikicode.ifilter_tags(matches=lambda node: node.tag == "table"):
+        if not table.has("class"):
+            continue
+        if "wikitable" not in str(table.get("class").value).split():
+            continue
+
+        yield from table.contents.ifilter_tags(
+            recursive=False, matches=lambda node: node.tag == "tr"
+        )
+
 
 class DetailsNotFoundError(Exception):
     pass
@@ -50,6 +130,16 @@ def parse_args():
         type=pathlib.Path,
         help=("Location to dump quest data to"),
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-fetch quest requirements even if the loaded quest data has them",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Fetch every wiki page fresh, replacing any cached copies",
+    )
     parser.add_argument(
         "--quests", nargs="+", metavar="QUEST_NAME", help="Only parse specific quests"
     )
@@ -58,6 +148,18 @@ def parse_args():
 
 
 class Quest:
+    __slots__ = (
+        "number",
+        "title",
+        "slug",
+        "difficulty",
+        "length",
+        "quest_points",
+        "series",
+        "_loaded",
+        "_requirements",
+    )
+
     def __init__(
         self,
         number: float,
@@ -76,35 +178,43 @@ class Quest:
         self.quest_points = quest_points
         self.series = series
 
-        self.__loaded = False
+        self._loaded = False
         self._requirements: Dict[LevelNameType, int] = {}
 
     @property
     def requirements(self) -> Dict[LevelNameType, int]:
-        if not self.__loaded:
+        if not self._loaded:
             self._load()
 
         return self._requirements
 
     def _load(self) -> None:
-        if self.__loaded:
+        if self._loaded:
             return
 
-        soup = BeautifulSoup(
-            requests.get(f"https://oldschool.runescape.wiki{self.slug}").text,
-            "html.parser",
+        html = _cached_get(
+            f"html:{self.slug}", f"https://oldschool.runescape.wiki{self.slug}"
         )
-        for span in soup.find_all("span", class_="SkillClickPic"):
-            parent = span.find_parent("td")
-            if parent is None:
-                continue
+        self._requirements = self._parse_requirements(html)
+        self._loaded = True
+
+    @staticmethod
+    def _parse_requirements(html: bytes) -> Dict[LevelNameType, int]:
+        requirements: Dict[LevelNameType, int] = {}
+
+        # Only table cells can hold requirements, so skip building the rest of
+        # the page; this also makes a td ancestor check unnecessary
+        soup = BeautifulSoup(html, "lxml", parse_only=SoupStrainer("td"))
+        for span in soup.select("td span.SkillClickPic"):
+            link = span.find("a")
             text = span.get_text().strip().split("\xa0")[0]
-            if not text:
+            if not text or link is None:
                 continue
 
-            self._requirements[span.find("a")["title"].lower()] = int(text)
+            # Every quest repeats the same couple dozen skill names
+            requirements[sys.intern(link["title"].lower())] = int(text)
 
-        self.__loaded = True
+        return requirements
 
     def _as_dict(self) -> Dict[str, Any]:
         return {
@@ -115,12 +225,15 @@ class Quest:
             "length": self.length,
             "quest_points": self.quest_points,
             "series": self.series,
+            "requirements": self._requirements,
+            "loaded": self._loaded,
         }
 
 
 class QuestDatabase:
     def __init__(self, quest_data: List[Quest]) -> None:
         self._quest_dict = {q.title: q for q in quest_data}
+        self._quest_titles = frozenset(self._quest_dict)
 
     @property
     def quests(self):
@@ -131,146 +244,275 @@ class QuestDatabase:
 
     @classmethod
     def from_web(self) -> "QuestDatabase":
-        soup = BeautifulSoup(
-            requests.get("https://oldschool.runescape.wiki/w/Quests/List").text,
-            "html.parser",
+        # Pull the list as wikitext through the API rather than scraping the
+        # rendered page; the table rows come straight out of the parse tree
+        parameters = {
+            "action": "parse",
+            "prop": "wikitext",
+            "format": "json",
+            "page": "Quests/List",
+        }
+        result = json.loads(
+            _cached_get(
+                "list:Quests/List",
+                "https://oldschool.runescape.wiki/api.php",
+                parameters,
+            )
         )
+        wikicode = mwparserfromhell.parse(result["parse"]["wikitext"]["*"])
 
         all_quests: List[Quest] = []
-        for row in soup.find_all("tr"):
-            data_row = []
-            for i, cell in enumerate(row.find_all("td")):
-                text = cell.get_text().strip()
-
-                if i == 0:
-                    text = float(text)
-                elif i == 4:
-                    text = int(text)
-
-                data_row.append(text)
+        for row in _wikitable_rows(wikicode):
+            cells = row.contents.filter_tags(
+                recursive=False, matches=lambda node: node.tag == "td"
+            )
 
-                if i == 1:
-                    data_row.append(cell.find("a").get("href"))
+            # Header and filler rows don't have the six quest columns; skip
+            # them before extracting any text
+            if len(cells) != 6:
+                continue
 
-            if len(data_row) != 7:
+            links = cells[1].contents.filter_wikilinks()
+            if not links:
                 continue
 
-            all_quests.append(Quest(*data_row))
+            text = [cell.contents.strip_code().strip() for cell in cells]
+            all_quests.append(
+                Quest(
+                    float(text[0]),
+                    text[1],
+                    _wiki_slug(str(links[0].title).strip()),
+                    text[2],
+                    text[3],
+                    int(text[4]),
+                    text[5],
+                )
+            )
 
         return QuestDatabase(all_quests)
 
     @classmethod
-    def from_file(self, path: pathlib.Path) -> "QuestDatabase":
-        with path.open("r") as f:
-            json_quests = json.load(f)
+    def from_file(
+        self, path: pathlib.Path, with_requirements: bool = True
+    ) -> "QuestDatabase":
+        if orjson is not None:
+            json_quests = orjson.loads(path.read_bytes())
+        else:
+            with path.open("r") as f:
+                json_quests = json.load(f)
 
         quests: List[Quest] = []
         for quest in json_quests:
-            quests.append(
-                Quest(
-                    quest["number"],
-                    quest["title"],
-                    quest["slug"],
-                    quest["difficulty"],
-                    quest["length"],
-                    quest["quest_points"],
-                    quest["series"],
-                )
+            q = Quest(
+                quest["number"],
+                quest["title"],
+                quest["slug"],
+                quest["difficulty"],
+                quest["length"],
+                quest["quest_points"],
+                quest["series"],
             )
+
+            # Dumps taken after requirements were fetched carry them along, so
+            # the quest pages don't need to be downloaded again
+            if with_requirements and quest.get("loaded"):
+                q._requirements = quest["requirements"]
+                q._loaded = True
+
+            quests.append(q)
         return QuestDatabase(quests)
 
+    def prefetch_requirements(
+        self, quests: Iterable[Quest] = None, workers: int = 16
+    ) -> None:
+        if quests is None:
+            quests = self.quests
+
+        # Load quest pages in parallel up front instead of one at a time on
+        # first access to each quest's requirements
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda q: q._load(), quests))
+
     def dump_to_file(self, path: pathlib.Path) -> None:
-        with path.open("w") as f:
-            json.dump([q._as_dict() for q in self.quests], f, sort_keys=True, indent=4)
+        quests = [q._as_dict() for q in self.quests]
+        if orjson is not None:
+            path.write_bytes(
+                orjson.dumps(quests, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2)
+            )
+            return
+
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(quests, f, sort_keys=True, indent=2, ensure_ascii=False)
 
 
 class Requirement:
+    __slots__ = ("parent", "dependencies", "_dot_repr")
+
     def __init__(self):
         self.parent = None
         self.dependencies = []
+        self._dot_repr = None
 
     def add_dependency(self, dependency):
-        self.dependencies.append(dependency)
+        # Quest nodes are shared, so the same dependency may be listed twice
+        if dependency not in self.dependencies:
+            self.dependencies.append(dependency)
         dependency.parent = self
 
-    @property
-    def _dependency_repr(self):
-        if not self.dependencies:
-            return ""
+    def render(self, out: List[str]) -> None:
+        out.append(object.__repr__(self))
 
-        return ", " + ", ".join([str(d) for d in self.dependencies])
+    def __repr__(self):
+        out: List[str] = []
+        self.render(out)
+        return "".join(out)
 
     def __str__(self):
         return self.__repr__()
 
+    @property
+    def dot_repr(self):
+        # Memoized in a slot since cached_property needs an instance __dict__
+        if self._dot_repr is None:
+            self._dot_repr = self._build_dot_repr()
+
+        return self._dot_repr
+
 
 class EmptyRequirement(Requirement):
-    pass
+    __slots__ = ()
 
 
 class UnknownRequirement(Requirement):
+    __slots__ = ("text",)
+
     def __init__(self, text):
         super().__init__()
         self.text = text
 
-    def __repr__(self):
-        return f"UnknownRequirement({self.text})"
+    def render(self, out: List[str]) -> None:
+        out.append(f"UnknownRequirement({self.text})")
 
-    @property
-    def dot_repr(self):
+    def _build_dot_repr(self):
         return f'"{self.text}"'
 
 
 class QuestRequirement(Requirement):
+    __slots__ = ("name",)
+
     def __init__(self, name):
         super().__init__()
         self.name = name
 
-    def __repr__(self):
-        return f"QuestRequirement({self.name}{self._dependency_repr})"
+    def render(self, out: List[str]) -> None:
+        # Expand nested quests off an explicit stack so deep graphs neither
+        # recurse nor rebuild every subtree's string at each level. Quest
+        # nodes are shared and guides can list each other, so a quest already
+        # being expanded further up is rendered without its dependencies
+        stack: List[Any] = [self]
+        expanding: Set[int] = set()
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                out.append(item)
+            elif isinstance(item, tuple):
+                expanding.discard(id(item[0]))
+            elif isinstance(item, QuestRequirement):
+                if id(item) in expanding:
+                    out.append(f"QuestRequirement({item.name})")
+                    continue
 
-    @property
-    def dot_repr(self):
+                expanding.add(id(item))
+                out.append(f"QuestRequirement({item.name}")
+                stack.append((item,))
+                stack.append(")")
+                for dependency in reversed(item.dependencies):
+                    stack.append(dependency)
+                    stack.append(", ")
+            else:
+                item.render(out)
+
+    def _build_dot_repr(self):
         return f'"{self.name}"'
 
 
 class SkillRequirement(Requirement):
+    __slots__ = ("name", "level")
+
     def __init__(self, name, level):
         super().__init__()
         self.name = name
         self.level = level
 
-    def __repr__(self):
-        return f"SkillRequirement({self.level} {self.name})"
+    def render(self, out: List[str]) -> None:
+        out.append(f"SkillRequirement({self.level} {self.name})")
 
-    @property
-    def dot_repr(self):
+    def _build_dot_repr(self):
         return f'"{self.level} {self.name}"'
 
 
+def _splice_empty_requirements(requirement, visited):
+    if id(requirement) in visited:
+        return
+    visited.add(id(requirement))
+
+    # Collapse each child's empties first so an empty's dependencies can be
+    # lifted into this node as-is, which also handles chains of empties
+    dependencies = []
+    for dependency in requirement.dependencies:
+        _splice_empty_requirements(dependency, visited)
+        if isinstance(dependency, EmptyRequirement):
+            dependencies.extend(dependency.dependencies)
+            dependency.parent = None
+        else:
+            dependencies.append(dependency)
+
+    for dependency in dependencies:
+        dependency.parent = requirement
+    requirement.dependencies = dependencies
+
+
 def remove_empty_requirements(requirements):
     if not requirements or not requirements.dependencies:
         return requirements
 
-    queue = deque()
-    for dependency in requirements.dependencies:
-        queue.append(dependency)
+    _splice_empty_requirements(requirements, set())
+    return requirements
 
-    paths = []
-    while queue:
-        dependency = queue.popleft()
 
-        for dep in dependency.dependencies:
-            if isinstance(dependency, EmptyRequirement):
-                dep.parent = dependency.parent
-                dep.parent.add_dependency(dep)
-            queue.append(dep)
+def _requirement_lines(
+    wiki_requirements: mwparserfromhell.wikicode.Wikicode,
+) -> List[mwparserfromhell.wikicode.Wikicode]:
+    # Group the top-level nodes into one Wikicode per source line, splitting
+    # text nodes on newlines so templates and links stay parsed
+    lines: List[List[Any]] = [[]]
+    for node in wiki_requirements.nodes:
+        if not isinstance(node, Text) or "\n" not in node.value:
+            lines[-1].append(node)
+            continue
 
-        if isinstance(dependency, EmptyRequirement):
-            dependency.parent.dependencies.remove(dependency)
-            dependency.parent = None
+        first, *rest = node.value.split("\n")
+        if first:
+            lines[-1].append(Text(first))
+        for piece in rest:
+            lines.append([Text(piece)] if piece else [])
 
-    return requirements
+    codes = [parse_anything(nodes) for nodes in lines]
+    while codes and not str(codes[0]).strip():
+        codes.pop(0)
+    while codes and not str(codes[-1]).strip():
+        codes.pop()
+
+    # Match str(...).strip(): a list starting on the "=" line has leading
+    # whitespace that would otherwise count towards the first line's indent
+    if codes:
+        first = codes[0]
+        while isinstance(first.nodes[0], Text) and not first.nodes[0].value.strip():
+            first.nodes.pop(0)
+        if isinstance(first.nodes[0], Text):
+            first.nodes[0].value = first.nodes[0].value.lstrip()
+
+    return codes
 
 
 def parse_requirements(
@@ -279,22 +521,28 @@ def parse_requirements(
     wiki_requirements: mwparserfromhell.wikicode.Wikicode,
     base_requirement,
     fetched_quests,
+    quest_nodes,
 ):
     skills = []
-    root_requirement = find_quest(base_requirement, quest_name)
-    if root_requirement is None:
-        root_requirement = base_requirement
+    # Every quest node is interned in quest_nodes, so no need to search the graph
+    root_requirement = quest_nodes.get(quest_name, base_requirement)
 
     # Build list of quest names to fetch, pass in list of already fetched quests
-    quests_to_fetch = set()
+    quests_to_fetch: Set[str] = set()
+    quest_titles = quest_db._quest_titles
     requirement = root_requirement
     last_req = None
-    last_level = 0
-    for part in str(wiki_requirements).strip().split("\n"):
-        part = part[1:]
-        full_len = len(part)
-        part = part.lstrip("*")
-        current_level = full_len - len(part)
+    last_level: int = 0
+    part: str
+    for line in _requirement_lines(wiki_requirements):
+        part = str(line)[1:]
+
+        # Count leading bullets in place rather than allocating via lstrip
+        current_level: int = 0
+        part_len: int = len(part)
+        while current_level < part_len and part[current_level] == "*":
+            current_level += 1
+        part = part[current_level:]
         if current_level > last_level:
             if current_level - last_level > 1:
                 raise TooManyAddedLevelsError()
@@ -309,51 +557,61 @@ def parse_requirements(
                 requirement = requirement.parent
                 last_level -= 1
 
-        if not any(p in part for p in {"{{", "[["}):
+        if not ("{{" in part or "[[" in part):
             last_req = EmptyRequirement()
             requirement.add_dependency(last_req)
             continue
 
-        if "Skill clickpic" in part:
-            if part.startswith("{{"):
-                skill_parts = part.replace("{", "").replace("}", "").split("|")
-                last_req = SkillRequirement(
-                    skill_parts[1], int(skill_parts[2].split(" ")[0])
-                )
-            else:
-                try:
-                    space_parts = part.split(" ")
-                    level = int(space_parts[0])
-                    name = space_parts[2].split("|")[1].replace("}}", "")
-                    last_req = SkillRequirement(name, level)
-                except Exception:
-                    LOG.warning(f"Unable to determine skill for line: {part}")
-                    continue
+        skill_templates = line.filter_templates(
+            matches=lambda template: template.name.matches(_SKILLCLICK_TOKEN)
+        )
+        if skill_templates:
+            # Either {{Skill clickpic|Name|Level}} or "Level {{Skill clickpic|Name}}"
+            template = skill_templates[0]
+            try:
+                name = str(template.get(1).value).strip()
+                if template.has(2):
+                    level = int(str(template.get(2).value).split(" ")[0])
+                else:
+                    level = int(part.split(" ")[0])
+            except ValueError:
+                # Missing parameters and non-numeric levels both land here
+                LOG.warning(f"Unable to determine skill for line: {part}")
+                continue
+
+            last_req = SkillRequirement(name, level)
 
             requirement.add_dependency(last_req)
             continue
 
-        matches = re.findall(r"\[\[([^\]]+?)\]\]", part)
         found_useful_thing = False
-        for match in matches:
-            if quest_db.quest_exists(match):
+        for link in line.ifilter_wikilinks():
+            match = str(link.title).strip()
+            if match in quest_titles:
                 if match not in fetched_quests:
                     quests_to_fetch.add(match)
-                last_req = QuestRequirement(match)
+                last_req = quest_nodes.get(match)
+                if last_req is None:
+                    last_req = quest_nodes[match] = QuestRequirement(match)
                 found_useful_thing = True
                 requirement.add_dependency(last_req)
 
         if not found_useful_thing:
-            last_req = UnknownRequirement(
-                part.lstrip("*").replace("[", "").replace("]", "")
-            )
+            # Leading bullets were already consumed by the indent scan
+            last_req = UnknownRequirement(part.translate(_BRACKET_STRIP))
             requirement.add_dependency(last_req)
 
-    for quest in sorted(quests_to_fetch):
-        requirement_node = get_quest_requirements_and_merge(
-            quest_db, quest, base_requirement, fetched_quests
+    # Fetch every quest at this level concurrently, then merge them one at a
+    # time so only the main thread ever mutates the requirement graph
+    quests_to_fetch = sorted(quests_to_fetch)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        wiki_texts = list(executor.map(_fetch_wikitext, quests_to_fetch))
+    fetched_quests.update(quests_to_fetch)
+
+    for quest, wiki_text in zip(quests_to_fetch, wiki_texts):
+        _merge_wikitext(
+            quest_db, quest, wiki_text, base_requirement, fetched_quests, quest_nodes
         )
-        fetched_quests.add(quest)
 
     return remove_empty_requirements(root_requirement)
 
@@ -362,18 +620,22 @@ def find_quest(requirements, quest_name):
     if not requirements.dependencies and requirements.name != quest_name:
         return None
 
-    queue = deque()
-    for dependency in requirements.dependencies:
-        queue.append(dependency)
+    # Walk a plain list by index; it stays FIFO without deque bookkeeping.
+    # Quest nodes are shared (and may form cycles), so expand each only once
+    queue = list(requirements.dependencies)
+    visited = {id(requirements)}
+    i = 0
+    while i < len(queue):
+        dependency = queue[i]
+        i += 1
+        if id(dependency) in visited:
+            continue
+        visited.add(id(dependency))
 
-    paths = []
-    while queue:
-        dependency = queue.popleft()
         if isinstance(dependency, QuestRequirement) and dependency.name == quest_name:
             return dependency
 
-        for dep in dependency.dependencies:
-            queue.append(dep)
+        queue.extend(dependency.dependencies)
 
     return None
 
@@ -386,42 +648,47 @@ def build_dot_repr(requirements):
     if not requirements.dependencies:
         return initial_repr
 
-    quests.append(initial_repr + ";")
+    quests.append(initial_repr)
 
-    queue = deque()
-    for dependency in requirements.dependencies:
-        queue.append(dependency)
+    # Quest nodes are shared between parents, so walk edges from each node
+    # and only emit (and expand) a node the first time it is reached
+    visited = {id(requirements)}
+    queue = [requirements]
+    i = 0
 
     paths = []
-    while queue:
-        dependency = queue.popleft()
-        dot_repr = dependency.dot_repr
-        if isinstance(dependency, QuestRequirement):
-            quests.append(dot_repr + ";")
-        elif isinstance(dependency, SkillRequirement):
-            skills.append(dot_repr + ";")
-
-        paths.append(f"{dependency.dot_repr} -> {dependency.parent.dot_repr};")
-        for dep in dependency.dependencies:
-            queue.append(dep)
+    while i < len(queue):
+        requirement = queue[i]
+        i += 1
+        requirement_repr = requirement.dot_repr
+        for dependency in requirement.dependencies:
+            dot_repr = dependency.dot_repr
+            paths.append(dot_repr + " -> " + requirement_repr)
+            if id(dependency) in visited:
+                continue
+            visited.add(id(dependency))
+
+            dependency_type = type(dependency)
+            if dependency_type is QuestRequirement:
+                quests.append(dot_repr)
+            elif dependency_type is SkillRequirement:
+                skills.append(dot_repr)
+
+            queue.append(dependency)
 
     lines = ["digraph {", "  node[style=filled, fillcolor=darkslategray1];"]
-    lines.extend(["  " + q for q in quests])
+    lines.extend("  " + q + ";" for q in quests)
     if skills:
         lines.append("  node[style=filled, fillcolor=darkseagreen];")
-        lines.extend(["  " + s for s in skills])
+        lines.extend("  " + s + ";" for s in skills)
 
     lines.append("  node[style=filled, fillcolor=white];")
-    lines.extend(["  " + p for p in paths])
+    lines.extend("  " + p + ";" for p in paths)
     lines.append("}")
     return "\n".join(lines)
 
 
-def get_quest_requirements_and_merge(
-    quest_db, quest_name, requirements, fetched_quests
-):
-    custom_agent = {"User-Agent": "quest-script", "From": "user@script"}
-
+def _fetch_wikitext(quest_name: str) -> str:
     # Construct the parameters of the API query
     parameters = {
         "action": "parse",
@@ -430,13 +697,20 @@ def get_quest_requirements_and_merge(
         "page": f"{quest_name}/Quick guide",
     }
 
-    # Call the API using the custom user-agent and parameters
-    result = requests.get(
-        "https://oldschool.runescape.wiki/api.php",
-        headers=custom_agent,
-        params=parameters,
-    ).json()
-    p = mwparserfromhell.parse(result["parse"]["wikitext"]["*"])
+    # Call the API using the shared session (custom user-agent is set there),
+    # unless a previous run already stored this page
+    result = json.loads(
+        _cached_get(
+            f"qg:{quest_name}", "https://oldschool.runescape.wiki/api.php", parameters
+        )
+    )
+    return result["parse"]["wikitext"]["*"]
+
+
+def _merge_wikitext(
+    quest_db, quest_name, wiki_text, requirements, fetched_quests, quest_nodes
+):
+    p = mwparserfromhell.parse(wiki_text)
     templates = p.filter_templates(matches="Quest details")
     if not templates:
         raise DetailsNotFoundError()
@@ -449,7 +723,7 @@ def get_quest_requirements_and_merge(
         quest_requirements = template.get("requirements")
     except ValueError:
         fetched_quests.add(quest_name)
-        return QuestRequirement(quest_name)
+        return quest_nodes.setdefault(quest_name, QuestRequirement(quest_name))
 
     return parse_requirements(
         quest_db,
@@ -457,15 +731,31 @@ def get_quest_requirements_and_merge(
         quest_requirements.value,
         requirements,
         fetched_quests=fetched_quests,
+        quest_nodes=quest_nodes,
+    )
+
+
+def get_quest_requirements_and_merge(
+    quest_db, quest_name, requirements, fetched_quests, quest_nodes
+):
+    return _merge_wikitext(
+        quest_db,
+        quest_name,
+        _fetch_wikitext(quest_name),
+        requirements,
+        fetched_quests,
+        quest_nodes,
     )
 
 
 def get_quest_requirements(quest_db, quest_name):
+    root = QuestRequirement(quest_name)
     requirements = get_quest_requirements_and_merge(
         quest_db,
         quest_name,
-        requirements=QuestRequirement(quest_name),
-        fetched_quests=set(),
+        requirements=root,
+        fetched_quests={quest_name},
+        quest_nodes={quest_name: root},
     )
     print(build_dot_repr(requirements))
     # print(find_quest(requirements, "Dream Mentor"))
@@ -474,6 +764,9 @@ def get_quest_requirements(quest_db, quest_name):
 def main():
     args = parse_args()
 
+    if args.no_cache:
+        _CACHE.read_enabled = False
+
     # player_levels = get_levels(args.player)
 
     if args.load_quest_data_from:
@@ -482,21 +775,28 @@ def main():
                 f'Specified quest data file "{args.load_quest_data_from}" does not exist'
             )
             return 1
-        db = QuestDatabase.from_file(args.load_quest_data_from)
+        db = QuestDatabase.from_file(
+            args.load_quest_data_from, with_requirements=not args.refresh
+        )
     else:
         db = QuestDatabase.from_web()
 
     if args.dump_quest_data_to:
+        # Fill in every quest's requirements so the dump can stand in for
+        # the quest pages on later runs
+        db.prefetch_requirements()
         db.dump_to_file(args.dump_quest_data_to)
 
     get_quest_requirements(db, args.quests[0])
 
     return 0
 
-    for quest in db.quests:
-        if args.quests and quest.title not in args.quests:
-            continue
-        rows = []
+    targets = [q for q in db.quests if not args.quests or q.title in args.quests]
+    db.prefetch_requirements(targets)
+
+    # Collect every quest's rows and format them in one table
+    rows = []
+    for quest in targets:
         for skill, requirement in quest.requirements.items():
             level_data = player_levels.get(skill)
             if level_data is None:
@@ -506,13 +806,18 @@ def main():
             current_level = level_data["level"]
             rows.append(
                 [
+                    quest.title,
                     skill,
                     requirement,
                     current_level,
                     "yes" if current_level >= requirement else "no",
                 ]
             )
-        print(tabulate(rows, headers=["skill", "requirement", "current_level", "met"]))
+    print(
+        tabulate(
+            rows, headers=["quest", "skill", "requirement", "current_level", "met"]
+        )
+    )
 
     return 0
 
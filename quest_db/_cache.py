@@ -0,0 +1,76 @@
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+DEFAULT_CACHE_PATH = pathlib.Path.home() / ".cache" / "quest_db" / "wiki.sqlite"
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class Cache:
+    def __init__(self, path: pathlib.Path = DEFAULT_CACHE_PATH) -> None:
+        self.path = path
+        # When off, lookups miss but fresh responses are still stored
+        self.read_enabled = True
+
+        # Fetches run on worker threads, so a single connection is shared
+        # behind a lock rather than opened per thread
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, "
+                    "last_modified TEXT, fetched_at REAL NOT NULL)"
+                )
+
+        return self._conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        if not self.read_enabled:
+            return None
+
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT body, etag, last_modified, fetched_at FROM responses "
+                    "WHERE key = ?",
+                    (key,),
+                )
+                .fetchone()
+            )
+
+        if row is None:
+            return None
+
+        return CacheEntry(*row)
+
+    def set(
+        self,
+        key: str,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, body, etag, last_modified, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, body, etag, last_modified, time.time()),
+                )
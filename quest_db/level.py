@@ -1,4 +1,6 @@
-from typing import Dict, List, NamedTuple, Optional
+import functools
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional
 
 import requests
 
@@ -7,15 +9,31 @@ PlayerNameType = str
 
 LevelMetadata = Dict[str, Dict[str, int]]
 
+# Shared session so repeated hiscore lookups reuse a keep-alive connection
+_SESSION = requests.Session()
+_REQUEST_TIMEOUT = 30
 
-def get_levels(player: PlayerNameType) -> Dict[LevelNameType, LevelMetadata]:
-    response = requests.get(f"https://www.ge-tracker.com/api/hiscore/{player}").json()
+
+def get_session() -> requests.Session:
+    return _SESSION
+
+
+# Results are cached per player, so they are handed out as read-only views
+@functools.lru_cache(maxsize=128)
+def get_levels(player: PlayerNameType) -> Mapping[LevelNameType, Mapping[str, int]]:
+    http_response = _SESSION.get(
+        f"https://www.ge-tracker.com/api/hiscore/{player}", timeout=_REQUEST_TIMEOUT
+    )
+    http_response.raise_for_status()
+    response = http_response.json()
 
     ret = {}
     for skill, stats in response["data"]["stats"].items():
-        ret[skill] = {
-            "rank": int(stats["rank"]),
-            "exp": int(stats["exp"]),
-            "level": int(stats["level"]),
-        }
-    return ret
+        ret[skill] = MappingProxyType(
+            {
+                "rank": int(stats["rank"]),
+                "exp": int(stats["exp"]),
+                "level": int(stats["level"]),
+            }
+        )
+    return MappingProxyType(ret)